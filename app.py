@@ -1,11 +1,9 @@
 import os
-import shutil
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
 from langchain_upstage import UpstageEmbeddings, ChatUpstage
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
+from index_refresher import IndexRefresher
 
 # ====================================
 # 🌟 기본 설정
@@ -48,45 +46,14 @@ if not api_key:
     st.stop()
 
 # ====================================
-# 🧠 벡터 DB 로드 함수
+# 🧠 벡터 DB 로드 함수 (백그라운드 갱신기)
 # ====================================
 
 @st.cache_resource
-def load_vectorstore():
-    folder_path = "Result_crawling"
-    documents = []
-
-    # ✅ 1. 크롤링된 텍스트 읽기
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".txt"):
-            with open(os.path.join(folder_path, filename), "r", encoding="utf-8") as f:
-                documents.append(f.read())
-
-    # ✅ 2. 제목 단위로 분리 (제목 + 본문 묶음) + 길이 초과 방지
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
-    texts = []
-
-    for doc in documents:
-        sections = doc.split("[제목]")
-        for section in sections:
-            section = section.strip()
-            if not section:
-                continue
-
-            lines = section.split("\n")
-            title = lines[0].strip()
-            body = "\n".join(lines[1:]).strip()
-            combined = f"[제목]{title}\n{body}"
-
-            # 👇 너무 긴 청크는 splitter로 다시 잘라서 추가
-            for chunk in splitter.split_text(combined):
-                texts.append(chunk)
-
-
-    # ✅ 3. 벡터 임베딩 생성
+def get_refresher():
+    # 프로세스당 하나의 갱신기: 재크롤링 → 변경 페이지만 재색인 → 완성 후 교체
     embedding = UpstageEmbeddings(model="solar-embedding-1-large")
-    vectorstore = Chroma.from_texts(texts, embedding=embedding, persist_directory="chroma_db")
-    return vectorstore
+    return IndexRefresher(embedding).start()
 
 # ====================================
 # 🚀 사이드바 UI
@@ -97,12 +64,15 @@ st.sidebar.header("⚙️ 설정 및 기능")
 # 🔁 DB 다시 생성 버튼
 rebuild = st.sidebar.button("🔁 DB 다시 생성하기")
 if rebuild:
-    if os.path.exists("chroma_db"):
-        shutil.rmtree("chroma_db")
-        st.sidebar.success("✅ 기존 DB 삭제 완료! 새로 생성 중...")
-    load_vectorstore.clear()
-    vectorstore = load_vectorstore()
-    st.sidebar.success("🎉 새 DB 생성 완료!")
+    get_refresher().request_refresh()
+    st.sidebar.info("📨 갱신을 요청했습니다. 백그라운드에서 변경된 페이지만 다시 색인하며, 완료 전까지 기존 DB로 답변합니다.")
+
+# 🕒 마지막 갱신 상태 (갱신 담당 프로세스가 기록)
+status = get_refresher().status()
+if status.get("last_refresh"):
+    st.sidebar.caption(f"🕒 마지막 색인 갱신: {status['last_refresh']} (변경 {status.get('last_changed', 0)}개)")
+if status.get("last_error"):
+    st.sidebar.error(f"⚠️ 마지막 갱신 오류 ({status.get('last_attempt')}): {status['last_error']}")
 
 # 💡 예시 질문
 st.sidebar.markdown("---")
@@ -124,8 +94,8 @@ for q in example_questions:
 st.title("🎓 캠퍼스 파인더 RAG 챗봇")
 st.markdown("학교 공식 페이지 데이터를 기반으로 정확한 정보를 제공합니다 🏫")
 
-# ✅ 벡터스토어 로드
-vectorstore = load_vectorstore()
+# ✅ 벡터스토어 로드 (현재 서비스 중인 색인)
+vectorstore = get_refresher().vectorstore
 retriever = vectorstore.as_retriever(search_kwargs={"k": 5})  # 검색 폭 확장
 llm = ChatUpstage(model="solar-pro")
 qa_chain = RetrievalQA.from_chain_type(
@@ -1,4 +1,3 @@
-import os
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -7,27 +6,33 @@ from bs4 import BeautifulSoup
 
 CHROME_DRIVER_PATH = "./chromedriver.exe"
 URLS = [f"https://www.donga.ac.kr/kor/CMS/Contents/Contents.do?mCode=MN{code}" for code in range(115, 170)]
-SAVE_FOLDER = "Result_crawling"
-os.makedirs(SAVE_FOLDER, exist_ok=True)
 
-options = Options()
-options.add_argument("--headless")
-options.add_argument("--disable-gpu")
-options.add_argument("--no-sandbox")
 
-service = Service(CHROME_DRIVER_PATH)
-driver = webdriver.Chrome(service=service, options=options)
+def create_driver():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
 
-for url in URLS:
+    service = Service(CHROME_DRIVER_PATH)
+    return webdriver.Chrome(service=service, options=options)
+
+
+def page_filename(url):
+    mcode = url.split("mCode=MN")[-1]
+    return f"MN{mcode}.txt"
+
+
+def crawl_page(driver, url):
+    # 본문 영역이 없으면 None 반환
     driver.get(url)
     time.sleep(2)
 
     soup = BeautifulSoup(driver.page_source, "html.parser")
     content_div = soup.find("div", id="contents")
     if not content_div:
-        continue
+        return None
 
-    mcode = url.split("mCode=MN")[-1]
     result_text = f"[URL] {url}\n"
 
     last_was_title = False
@@ -72,11 +77,33 @@ for url in URLS:
                         result_text += line + "\n"
                         table_text_set.add(line)
 
-    file_path = os.path.join(SAVE_FOLDER, f"MN{mcode}.txt")
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(result_text)
+    return result_text
+
+
+def crawl_all(urls=URLS):
+    # {파일명: 페이지 텍스트} 반환, 본문을 찾지 못한 페이지는 제외
+    pages = {}
+    driver = create_driver()
+    try:
+        for url in urls:
+            text = crawl_page(driver, url)
+            if text is not None:
+                pages[page_filename(url)] = text
+    finally:
+        driver.quit()
+    return pages
+
+
+if __name__ == "__main__":
+    # 앱은 Crawlings/ 스냅샷을 색인하므로 (Result_crawling 폴더는 더 이상 사용하지 않음)
+    # 스냅샷에 저장한 뒤 갱신 담당 프로세스에 재색인을 요청한다
+    from index_refresher import SNAPSHOT_FOLDER, write_snapshot, request_refresh
 
-    print(f"✅ 저장 완료: MN{mcode}.txt")
+    pages = crawl_all()
+    write_snapshot(pages)
+    for filename in sorted(pages):
+        print(f"✅ 저장 완료: {SNAPSHOT_FOLDER}/{filename}")
 
-driver.quit()
-print("\n🎉 전체 크롤링 완료! 표 중복 제거 + 순서 보존 + RAG 구조 최적화 완료.")
+    request_refresh(crawl=False)
+    print("\n🎉 전체 크롤링 완료! 표 중복 제거 + 순서 보존 + RAG 구조 최적화 완료.")
+    print("📨 재색인을 요청했습니다. 실행 중인 앱 또는 index_refresher.py가 변경된 페이지만 반영합니다.")
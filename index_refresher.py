@@ -0,0 +1,444 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+from langchain_upstage import UpstageEmbeddings
+
+# ======================================
+# 1️⃣ 설정
+# ======================================
+SNAPSHOT_FOLDER = "Crawlings"        # 크롤링 결과 스냅샷 (색인 대상)
+DB_PATH = "chroma_db"
+ACTIVE_POINTER = "ACTIVE"            # DB_PATH 안에 현재 서비스 중인 컬렉션 이름 기록
+WRITER_LOCK = "refresher.lock"       # 갱신 담당(단일 writer) 프로세스 잠금 파일
+REFRESH_REQUEST = "REFRESH"          # 다른 프로세스가 갱신을 요청할 때 만드는 파일
+STATUS_FILE = "STATUS.json"          # 마지막 갱신 시각 / 오류 기록
+COLLECTION_PREFIX = "campus_pages"
+DEFAULT_REFRESH_INTERVAL = 6 * 60 * 60
+POLL_INTERVAL = 5                    # 갱신 요청 / 잠금 확인 주기 (초)
+
+splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
+
+
+# ======================================
+# 2️⃣ 스냅샷 읽기/쓰기 및 청크 분할
+# ======================================
+def read_snapshot(folder=SNAPSHOT_FOLDER):
+    pages = {}
+    if not os.path.isdir(folder):
+        return pages
+    for filename in os.listdir(folder):
+        if filename.endswith(".txt"):
+            with open(os.path.join(folder, filename), "r", encoding="utf-8") as f:
+                pages[filename] = f.read()
+    return pages
+
+
+def write_snapshot(pages, folder=SNAPSHOT_FOLDER):
+    # 임시 파일에 쓴 뒤 교체해서 반쯤 쓰인 스냅샷이 남지 않도록 함
+    os.makedirs(folder, exist_ok=True)
+    for filename, text in pages.items():
+        path = os.path.join(folder, filename)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def page_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def split_page(text):
+    # 제목 단위로 분리 (제목 + 본문 묶음) 후 너무 긴 청크는 다시 분할
+    chunks = []
+    for section in text.split("[제목]"):
+        section = section.strip()
+        if not section:
+            continue
+
+        lines = section.split("\n")
+        title = lines[0].strip()
+        body = "\n".join(lines[1:]).strip()
+        combined = f"[제목]{title}\n{body}"
+        chunks.extend(splitter.split_text(combined))
+    return chunks
+
+
+# ======================================
+# 3️⃣ 프로세스 간 공유 파일 (잠금 / 요청 / 상태)
+# ======================================
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _try_lock(path):
+    # 비차단 배타 잠금. 프로세스가 종료되면 OS가 자동으로 해제한다.
+    f = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def request_refresh(crawl=True, db_path=DB_PATH):
+    # 갱신 담당 프로세스(앱 또는 단독 실행)가 POLL_INTERVAL 안에 요청을 처리한다
+    # crawl=False면 재크롤링 없이 스냅샷 기준으로 재색인만 수행
+    os.makedirs(db_path, exist_ok=True)
+    path = os.path.join(db_path, REFRESH_REQUEST)
+    mode = "crawl" if crawl else "reindex"
+    if not crawl and os.path.exists(path):
+        return    # 이미 들어온 요청(재크롤링 포함)을 덮어쓰지 않음
+    _write_atomic(path, mode)
+
+
+def read_status(db_path=DB_PATH):
+    path = os.path.join(db_path, STATUS_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# ======================================
+# 4️⃣ 백그라운드 색인 갱신기
+# ======================================
+class IndexRefresher:
+    """
+    주기적으로 재크롤링해서 바뀐 페이지만 새 컬렉션(shadow)에 다시 임베딩하고,
+    완성된 뒤에 ACTIVE 포인터를 바꿔 서비스 중인 벡터스토어를 교체한다.
+
+    같은 DB_PATH를 쓰는 여러 프로세스 중 잠금 파일을 가진 하나만 갱신하고
+    컬렉션을 삭제한다(writer). 나머지(reader)는 ACTIVE 포인터만 따라간다.
+    """
+
+    def __init__(self, embedding, crawl=None, snapshot_folder=SNAPSHOT_FOLDER,
+                 db_path=DB_PATH, interval=None):
+        if crawl is None:
+            from crawling_donga import crawl_all as crawl
+        if interval is None:
+            interval = int(os.getenv("REFRESH_INTERVAL_SEC", str(DEFAULT_REFRESH_INTERVAL)))
+
+        self.embedding = embedding
+        self.crawl = crawl
+        self.snapshot_folder = snapshot_folder
+        self.db_path = db_path
+        self.interval = interval
+        os.makedirs(self.db_path, exist_ok=True)
+
+        self._refresh_lock = threading.Lock()   # 프로세스 안에서도 갱신은 한 번에 하나만
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None                  # writer 잠금 (None이면 reader)
+        self._retired = None                    # 진행 중인 질의를 위해 한 세대 보관
+        self._vectorstore = None
+        self._pointer_mtime = None
+        self._next_crawl = time.time() + self.interval
+
+        # writer가 아니고 아직 색인도 없으면 다른 writer가 만들 때까지 대기
+        self._try_become_writer()
+        while self._vectorstore is None:
+            if self._follow_pointer() or self._try_become_writer():
+                break
+            print("⏳ 다른 프로세스가 색인을 생성하는 중입니다. 완료를 기다립니다...")
+            time.sleep(POLL_INTERVAL)
+
+    @property
+    def is_writer(self):
+        return self._lock_file is not None
+
+    @property
+    def vectorstore(self):
+        # reader는 ACTIVE 포인터가 바뀌었으면 새 컬렉션을 다시 연다
+        if not self.is_writer:
+            self._follow_pointer()
+        return self._vectorstore
+
+    def status(self):
+        return read_status(self.db_path)
+
+    # ---------- 스레드 제어 ----------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def request_refresh(self, crawl=True):
+        request_refresh(crawl=crawl, db_path=self.db_path)
+
+    def _run(self):
+        # 어떤 오류가 나도 스레드가 죽지 않도록 루프 본문 전체를 보호
+        while not self._stop.wait(POLL_INTERVAL):
+            try:
+                crawl = self._next_job()
+            except Exception as e:
+                self._record_failure(f"갱신 준비 실패: {e}")
+                continue
+            if crawl is None:
+                continue
+            try:
+                self.refresh_once(crawl=crawl)
+            except Exception as e:
+                # 실패 상태는 refresh_once에서 이미 기록됨
+                print(f"⚠️ 색인 갱신 실패 (기존 색인 유지): {e}")
+
+    def _next_job(self):
+        # 이번 주기에 할 일: None(없음), True(재크롤링 + 재색인), False(재색인만)
+        # writer가 종료되면 남은 프로세스 중 하나가 이어받음
+        if not self.is_writer and not self._try_become_writer():
+            return None
+
+        mode = self._take_request()
+        if mode is None and time.time() < self._next_crawl:
+            return None
+        crawl = mode != "reindex"
+        if crawl:
+            self._next_crawl = time.time() + self.interval
+        return crawl
+
+    def _record_failure(self, error):
+        print(f"⚠️ {error} (기존 색인 유지)")
+        try:
+            self._write_status(error=error, changed=None)
+        except OSError:
+            pass
+
+    def _take_request(self):
+        path = os.path.join(self.db_path, REFRESH_REQUEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            mode = f.read().strip() or "crawl"
+        os.remove(path)
+        return mode
+
+    # ---------- 갱신 ----------
+    def refresh_once(self, crawl=True):
+        if not self.is_writer:
+            raise RuntimeError("❌ 다른 프로세스가 색인 갱신을 담당하고 있습니다.")
+
+        with self._refresh_lock:
+            # 크롤링에 실패해도 로컬 스냅샷 기준 재색인은 계속 진행
+            crawl_error = None
+            if crawl:
+                try:
+                    crawled = self.crawl()
+                    snapshot = read_snapshot(self.snapshot_folder)
+                    # 크롤링에 실패한 페이지는 삭제가 아닌 일시 오류로 보고 기존 내용 유지
+                    write_snapshot({name: text for name, text in crawled.items()
+                                    if snapshot.get(name) != text}, self.snapshot_folder)
+                except Exception as e:
+                    crawl_error = f"크롤링 실패: {e}"
+                    print(f"⚠️ {crawl_error} (로컬 스냅샷으로 재색인합니다)")
+
+            try:
+                changed = self._reindex_changed()
+            except Exception as e:
+                self._write_status(error=f"재색인 실패: {e}", changed=None)
+                raise
+            self._write_status(error=crawl_error, changed=changed)
+            return changed
+
+    def _reindex_changed(self):
+        # 색인에 기록된 페이지 해시와 스냅샷을 비교해서 바뀐 페이지만 재임베딩
+        # 청크가 하나도 없는 페이지(빈 파일 등)는 스냅샷에 없는 것으로 취급
+        pages = {name: text for name, text in read_snapshot(self.snapshot_folder).items()
+                 if split_page(text)}
+        indexed = self._indexed_hashes(self._vectorstore)
+        changed = {name: text for name, text in pages.items()
+                   if indexed.get(name) != page_hash(text)}
+        # 스냅샷에서 사라진 페이지는 색인에서도 제거
+        removed = set(indexed) - set(pages)
+        if not changed and not removed:
+            print("✅ 변경된 페이지가 없습니다.")
+            return 0
+
+        if changed:
+            print(f"🔁 변경된 페이지 {len(changed)}개 재색인 중: {', '.join(sorted(changed))}")
+        if removed:
+            print(f"🗑 삭제된 페이지 {len(removed)}개 제거: {', '.join(sorted(removed))}")
+        shadow = self._build_shadow(changed, base=self._vectorstore, removed=removed)
+        self._swap(shadow)
+        print("🎉 새 색인으로 교체 완료!")
+        return len(changed) + len(removed)
+
+    @staticmethod
+    def _indexed_hashes(vectorstore):
+        data = vectorstore._collection.get(include=["metadatas"])
+        return {meta["source"]: meta.get("hash") for meta in data["metadatas"]
+                if meta and "source" in meta}
+
+    def _build_shadow(self, pages, base=None, removed=()):
+        name = f"{COLLECTION_PREFIX}_{time.time_ns()}"
+        shadow = Chroma(collection_name=name, embedding_function=self.embedding,
+                        persist_directory=self.db_path)
+        try:
+            # 바뀌지 않은 페이지는 기존 임베딩을 그대로 복사 (재임베딩 없음)
+            if base is not None:
+                data = base._collection.get(include=["embeddings", "documents", "metadatas"])
+                keep = [i for i, meta in enumerate(data["metadatas"])
+                        if (meta or {}).get("source") not in pages
+                        and (meta or {}).get("source") not in removed]
+                if keep:
+                    shadow._collection.add(
+                        ids=[data["ids"][i] for i in keep],
+                        embeddings=[data["embeddings"][i] for i in keep],
+                        documents=[data["documents"][i] for i in keep],
+                        metadatas=[data["metadatas"][i] for i in keep],
+                    )
+
+            texts, metadatas, ids = [], [], []
+            for filename, text in pages.items():
+                digest = page_hash(text)
+                for i, chunk in enumerate(split_page(text)):
+                    texts.append(chunk)
+                    metadatas.append({"source": filename, "hash": digest})
+                    ids.append(f"{filename}-{i}")
+            if texts:
+                shadow.add_texts(texts, metadatas=metadatas, ids=ids)
+        except Exception:
+            shadow.delete_collection()
+            raise
+        return shadow
+
+    def _swap(self, shadow):
+        previous = self._vectorstore
+        self._vectorstore = shadow
+        self._write_pointer(shadow._collection.name)
+
+        # 직전 세대는 진행 중인 질의(다른 프로세스 포함)가 끝나도록 남겨두고, 그 이전 세대만 삭제
+        if self._retired is not None:
+            self._retired.delete_collection()
+        self._retired = previous
+
+    # ---------- writer 잠금 ----------
+    def _try_become_writer(self):
+        if self.is_writer:
+            return True
+        lock_file = _try_lock(os.path.join(self.db_path, WRITER_LOCK))
+        if lock_file is None:
+            return False
+        self._lock_file = lock_file
+        print("🔒 이 프로세스가 색인 갱신을 담당합니다.")
+
+        try:
+            self._follow_pointer()
+            if self._vectorstore is not None and self._vectorstore._collection.count() == 0:
+                self._vectorstore.delete_collection()
+                self._vectorstore = None
+            if self._vectorstore is None:
+                print("🧠 서비스 중인 색인이 없어 스냅샷으로 새로 생성합니다...")
+                self._vectorstore = self._build_shadow(read_snapshot(self.snapshot_folder))
+                self._write_pointer(self._vectorstore._collection.name)
+            self._drop_stale_collections()
+        except Exception:
+            # 준비에 실패하면 잠금을 놓아 다른 프로세스가 갱신을 이어받을 수 있게 함
+            self._lock_file.close()
+            self._lock_file = None
+            raise
+        return True
+
+    def _drop_stale_collections(self):
+        # writer만 호출: 이전 writer가 중단되며 남긴 shadow 컬렉션 정리
+        active_name = self._vectorstore._collection.name
+        client = self._vectorstore._client
+        for collection in client.list_collections():
+            name = getattr(collection, "name", collection)
+            if name.startswith(COLLECTION_PREFIX) and name != active_name:
+                client.delete_collection(name)
+
+    # ---------- 컬렉션 포인터 ----------
+    def _pointer_path(self):
+        return os.path.join(self.db_path, ACTIVE_POINTER)
+
+    def _write_pointer(self, name):
+        _write_atomic(self._pointer_path(), name)
+
+    def _follow_pointer(self):
+        # 포인터 파일이 바뀐 경우에만 읽어서 해당 컬렉션을 연다
+        try:
+            mtime = os.stat(self._pointer_path()).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._pointer_mtime and self._vectorstore is not None:
+            return True
+
+        with open(self._pointer_path(), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+        if not name:
+            return False
+        if self._vectorstore is None or self._vectorstore._collection.name != name:
+            self._vectorstore = Chroma(collection_name=name, embedding_function=self.embedding,
+                                       persist_directory=self.db_path)
+        self._pointer_mtime = mtime
+        return True
+
+    def _write_status(self, error, changed):
+        status = self.status()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        status["last_attempt"] = now
+        status["last_error"] = error
+        if changed is not None:
+            status["last_refresh"] = now
+            status["last_changed"] = changed
+        _write_atomic(os.path.join(self.db_path, STATUS_FILE),
+                      json.dumps(status, ensure_ascii=False, indent=2))
+
+
+# ======================================
+# 🚀 단독 실행 (python index_refresher.py [--once])
+# ======================================
+if __name__ == "__main__":
+    load_dotenv()
+    if not os.getenv("UPSTAGE_API_KEY"):
+        raise ValueError("❌ Upstage API 키가 설정되지 않았습니다. .env 파일을 확인하세요!")
+
+    refresher = IndexRefresher(UpstageEmbeddings(model="solar-embedding-1-large"))
+    if "--once" in sys.argv:
+        if refresher.is_writer:
+            refresher.refresh_once()
+        else:
+            refresher.request_refresh()
+            print("📨 다른 프로세스가 갱신을 담당하고 있어 갱신을 요청했습니다.")
+    else:
+        if not refresher.is_writer:
+            print("⏳ 다른 프로세스가 갱신을 담당하고 있습니다. 종료되면 이어받습니다.")
+        print(f"⏱ {refresher.interval}초마다 색인을 갱신합니다. (종료: Ctrl+C)")
+        refresher.request_refresh()
+        refresher.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            refresher.stop()
+            print("👋 갱신기를 종료합니다.")
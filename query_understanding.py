@@ -0,0 +1,255 @@
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# ======================================
+# 1️⃣ 기본 사전 (동의어 / 의도)
+# ======================================
+# 동의어 그룹: 첫 번째 항목이 대표어, 나머지는 약어·별칭
+# (수신, 전선, 부전, 마모처럼 다른 뜻으로도 흔히 쓰이는 약어는 query_dict.json에 추가)
+DEFAULT_SYNONYMS = [
+    ["동아대학교", "동아대"],
+    ["전공필수", "전필"],
+    ["전공선택", "전선택"],
+    ["교양필수", "교필"],
+    ["교양선택", "교선"],
+    ["복수전공", "복전"],
+    ["전공 마이크로모듈", "마이크로모듈"],
+    ["계절학기", "계절수업"],
+    ["졸업요건", "졸업 조건", "졸업기준"],
+    ["컴퓨터공학과", "컴공과", "컴공"],
+]
+
+# 동의어 뒤에 붙어도 되는 조사 (여러 개 연달아 붙을 수 있음: 에서+는, 으로+는, 까지+도)
+# 이 외의 한글이 이어지면 다른 단어의 일부로 보고 치환하지 않음
+PARTICLES = [
+    "은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "으로", "로",
+    "와", "과", "도", "만", "란", "이란", "이랑", "랑", "까지", "부터", "이나", "나",
+    "보다", "처럼", "하고", "이야", "야", "이에요", "예요", "인가요", "인가", "은요", "는요",
+]
+
+# 받침 유무에 따라 바뀌는 조사 쌍 (받침 있음, 받침 없음)
+PARTICLE_PAIRS = [
+    ("은", "는"), ("이", "가"), ("을", "를"), ("과", "와"), ("으로", "로"),
+    ("이란", "란"), ("이랑", "랑"), ("이나", "나"), ("이야", "야"), ("이에요", "예요"),
+]
+
+# 의도 표현 → LLM 프롬프트에 전달할 답변 지침 (벡터 검색에는 사용하지 않음)
+DEFAULT_INTENTS = {
+    "이게 뭐야": "정의와 개념을 설명해줘",
+    "이건 뭐야": "정의와 개념을 알려줘",
+    "어떻게": "절차나 방법을 설명해줘",
+    "왜": "이유와 목적을 알려줘",
+    "비교": "차이점을 설명해줘",
+    "같은가": "유사점과 차이점을 알려줘",
+}
+
+# 사용자 사전 기본 경로 (JSON: {"synonyms": [[...], ...], "intents": {...}})
+# 환경변수 QUERY_DICT_PATH로 바꿀 수 있음 (.env 로드 이후 from_file에서 읽음)
+DEFAULT_QUERY_DICT_PATH = "query_dict.json"
+
+
+# ======================================
+# 2️⃣ 질의 재작성기
+# ======================================
+class QueryRewriter:
+    def __init__(self, synonyms=None, intents=None, max_sub_queries: int = 4):
+        synonyms = DEFAULT_SYNONYMS if synonyms is None else synonyms
+        intents = DEFAULT_INTENTS if intents is None else intents
+        self.max_sub_queries = max_sub_queries
+
+        # 용어 → (종류, 값) 표: 동의어는 그룹 번호, 의도는 지침 문장
+        self._groups: List[List[str]] = []
+        self._terms: Dict[str, tuple] = {}
+        for group in synonyms:
+            terms = [t.strip().lower() for t in group if t.strip()]
+            if len(terms) < 2:
+                continue
+            index = len(self._groups)
+            self._groups.append(terms)
+            for term in terms:
+                self._terms.setdefault(term, ("synonym", index))
+        for phrase, hint in intents.items():
+            self._terms.setdefault(phrase.strip().lower(), ("intent", hint))
+
+        # 모든 용어를 하나의 정규식 오토마톤으로 컴파일 (긴 용어 우선 매칭)
+        # 동의어는 앞뒤가 한글 단어 경계일 때만 매칭 (뒤에는 조사만 허용)
+        synonym_terms = [t for t, (kind, _) in self._terms.items() if kind == "synonym"]
+        intent_terms = [t for t, (kind, _) in self._terms.items() if kind == "intent"]
+        branches = []
+        if synonym_terms:
+            particles = "|".join(re.escape(p) for p in sorted(PARTICLES, key=len, reverse=True))
+            branches.append(
+                r"(?<![가-힣a-z0-9])(?:" + _alternation(synonym_terms) + r")"
+                r"(?=(?:(?P<particle>" + particles + r")(?P<rest>(?:" + particles + r")*))?(?![가-힣]))"
+            )
+        if intent_terms:
+            branches.append(_alternation(intent_terms))
+        self._pattern = re.compile("|".join(branches)) if branches else None
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None, **kwargs) -> "QueryRewriter":
+        # 사용자 사전이 있으면 기본 사전에 병합, 없으면 기본 사전만 사용
+        if path is None:
+            path = os.getenv("QUERY_DICT_PATH", DEFAULT_QUERY_DICT_PATH)
+        synonyms = list(DEFAULT_SYNONYMS)
+        intents = dict(DEFAULT_INTENTS)
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            synonyms = config.get("synonyms", []) + synonyms
+            intents.update(config.get("intents", {}))
+        return cls(synonyms=synonyms, intents=intents, **kwargs)
+
+    def rewrite(self, query: str) -> dict:
+        # 반환값: {"sub_queries": 검색용 질의 목록, "hints": 프롬프트용 지침 목록}
+        query = query.strip().lower()
+        sub_queries = [query]
+        hints = []
+        if self._pattern is None:
+            return {"sub_queries": sub_queries, "hints": hints}
+
+        replacements = []
+        for match in self._pattern.finditer(query):
+            kind, value = self._terms[match.group(0)]
+            if kind == "intent":
+                if value not in hints:
+                    hints.append(value)
+                continue
+
+            # 약어/별칭만 대표어로 치환 (대표어 자체는 그대로 둠)
+            canonical = self._groups[value][0]
+            if match.group(0) != canonical:
+                # 받침에 맞추는 것은 바로 붙은 첫 조사뿐 (예: 복전에는 → 복수전공에는)
+                particle = match.group("particle") or ""
+                rest = match.group("rest") or ""
+                replacements.append((
+                    match.start(),
+                    match.end() + len(particle) + len(rest),
+                    canonical + _fit_particle(canonical, particle) + rest,
+                ))
+
+        if replacements:
+            # 모든 별칭을 대표어로 바꾼 질의 + 별칭 하나씩만 바꾼 변형 질의
+            candidates = [_apply(query, replacements)]
+            if len(replacements) > 1:
+                candidates += [_apply(query, [r]) for r in replacements]
+            for variant in candidates:
+                if len(sub_queries) >= self.max_sub_queries:
+                    break
+                if variant not in sub_queries:
+                    sub_queries.append(variant)
+
+        return {"sub_queries": sub_queries, "hints": hints}
+
+
+def _fit_particle(word: str, particle: str) -> str:
+    # 대표어의 마지막 글자 받침에 맞게 조사 형태를 맞춤 (예: 전필이란 → 전공필수란)
+    last = word[-1] if word else ""
+    if not particle or not ("가" <= last <= "힣"):
+        return particle
+    final = (ord(last) - ord("가")) % 28
+    for with_final, without_final in PARTICLE_PAIRS:
+        if particle in (with_final, without_final):
+            if with_final == "으로":
+                return "로" if final in (0, 8) else "으로"   # ㄹ 받침은 "로"
+            return with_final if final else without_final
+    return particle
+
+
+def _alternation(terms) -> str:
+    return "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+
+
+def _apply(query: str, replacements) -> str:
+    # (시작, 끝, 치환어) 목록을 뒤에서부터 적용해 위치가 어긋나지 않도록 함
+    for start, end, term in sorted(replacements, reverse=True):
+        query = query[:start] + term + query[end:]
+    return query
+
+
+# ======================================
+# 3️⃣ 확장 질의 검색 (배치 임베딩 + 병렬 검색 + RRF 결합)
+# ======================================
+_warned_fallback = False
+
+
+def embed_queries(embeddings, queries: List[str]) -> List[List[float]]:
+    """
+    여러 질의를 한 번의 API 호출로 임베딩한다.
+
+    UpstageEmbeddings는 질의 배치 메서드가 없어 내부 client와 _invocation_params를
+    직접 사용하고, embed_query와 같은 방식으로 모델명에 "-query"를 붙인다.
+    (requirements.txt의 langchain-upstage 0.1.x 기준)
+    내부 구조가 달라 배치 호출을 할 수 없으면 질의별 embed_query로 대체하고 경고를 출력한다.
+    """
+    global _warned_fallback
+    client = getattr(embeddings, "client", None)
+    params = getattr(embeddings, "_invocation_params", None)
+    if client is not None and isinstance(params, dict) and "model" in params:
+        params = dict(params)
+        params["model"] = params["model"] + "-query"
+        response = client.create(input=queries, **params)
+        if not isinstance(response, dict):
+            response = response.model_dump()
+        return [item["embedding"] for item in response["data"]]
+
+    if not _warned_fallback:
+        print(f"⚠️ {type(embeddings).__name__}에서 배치 질의 임베딩을 사용할 수 없어 "
+              "질의별로 임베딩합니다. langchain-upstage 버전을 확인하세요.")
+        _warned_fallback = True
+    return [embeddings.embed_query(q) for q in queries]
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int, rrf_k: int = 60,
+                           weights: Optional[List[float]] = None) -> List[Document]:
+    # weights: 결과 목록별 가중치 (기본값은 모두 1.0)
+    weights = weights or [1.0] * len(result_lists)
+    scores = {}
+    docs = {}
+    for results, weight in zip(result_lists, weights):
+        for rank, doc in enumerate(results):
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank + 1)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked[:k]]
+
+
+class ExpandedQueryRetriever(BaseRetriever):
+    vectorstore: Any
+    embeddings: Any
+    rewriter: Any
+    k: int = 8
+    fetch_k: Optional[int] = None
+    original_weight: float = 2.0    # 원래 질의 결과를 변형 질의보다 우선
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        sub_queries = self.rewriter.rewrite(query)["sub_queries"]
+        vectors = embed_queries(self.embeddings, sub_queries)
+        fetch_k = self.fetch_k or self.k
+
+        if len(vectors) == 1:
+            return self.vectorstore.similarity_search_by_vector(vectors[0], k=self.k)
+
+        with ThreadPoolExecutor(max_workers=len(vectors)) as executor:
+            result_lists = list(executor.map(
+                lambda v: self.vectorstore.similarity_search_by_vector(v, k=fetch_k),
+                vectors,
+            ))
+        weights = [self.original_weight] + [1.0] * (len(result_lists) - 1)
+        return reciprocal_rank_fusion(result_lists, k=self.k, weights=weights)
+
+
+def format_hints(hints: List[str]) -> str:
+    if not hints:
+        return "질문에 정확하고 간결하게 답변해줘"
+    return ", ".join(hints)
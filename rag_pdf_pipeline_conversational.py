@@ -7,6 +7,8 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_upstage import UpstageEmbeddings, ChatUpstage
 from langchain.chains import ConversationalRetrievalChain
+from langchain.prompts import PromptTemplate
+from query_understanding import QueryRewriter, ExpandedQueryRetriever, format_hints
 
 # ======================================
 # 1️⃣ 환경설정 및 상수
@@ -72,23 +74,19 @@ def build_vector_db(texts):
     return vectorstore
 
 # ======================================
-# 4️⃣ 사용자 질문 의도 확장 (semantic reformulation)
+# 4️⃣ 답변 프롬프트 (질문 의도 지침은 검색이 아닌 프롬프트에만 반영)
 # ======================================
-def refine_query(query: str) -> str:
-    # 의도 기반 질문 보정
-    query = query.strip().lower()
-    replacements = {
-        "이게 뭐야": "정의와 개념을 설명해줘",
-        "이건 뭐야": "정의와 개념을 알려줘",
-        "어떻게": "절차나 방법을 설명해줘",
-        "왜": "이유와 목적을 알려줘",
-        "비교": "차이점을 설명해줘",
-        "같은가": "유사점과 차이점을 알려줘"
-    }
-    for key, val in replacements.items():
-        if key in query:
-            query += f" ({val})"
-    return query
+QA_PROMPT = PromptTemplate(
+    input_variables=["context", "question", "hints"],
+    template=(
+        "다음 문서 내용을 참고하여 질문에 답변하세요. "
+        "문서에 없는 내용은 모른다고 답하세요.\n\n"
+        "{context}\n\n"
+        "질문: {question}\n"
+        "답변 지침: {hints}\n"
+        "답변:"
+    ),
+)
 
 # ======================================
 # 5️⃣ 챗봇 실행
@@ -98,13 +96,20 @@ def run_conversational_rag():
     vectorstore = build_vector_db(texts)
 
     llm = ChatUpstage(model="solar-pro")
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 8})
+    rewriter = QueryRewriter.from_file()
+    retriever = ExpandedQueryRetriever(
+        vectorstore=vectorstore,
+        embeddings=vectorstore.embeddings,
+        rewriter=rewriter,
+        k=8,
+    )
 
     qa_chain = ConversationalRetrievalChain.from_llm(
         llm=llm,
         retriever=retriever,
         return_source_documents=True,
-        chain_type="stuff"
+        chain_type="stuff",
+        combine_docs_chain_kwargs={"prompt": QA_PROMPT},
     )
 
     chat_history = []
@@ -117,10 +122,14 @@ def run_conversational_rag():
             print("👋 챗봇을 종료합니다.")
             break
 
-        # 질문 의도 보정
-        refined = refine_query(query)
+        # 질문 의도 분석: 동의어 확장은 검색기에서, 답변 지침은 프롬프트로 전달
+        hints = rewriter.rewrite(query)["hints"]
         try:
-            result = qa_chain.invoke({"question": refined, "chat_history": chat_history})
+            result = qa_chain.invoke({
+                "question": query,
+                "chat_history": chat_history,
+                "hints": format_hints(hints),
+            })
             answer = result["answer"].strip()
             print(f"\n🤖 답변:\n{answer}\n")
             chat_history.append((query, answer))
@@ -19,7 +19,9 @@ if not api_key:
 embedding = UpstageEmbeddings(model="solar-embedding-1-large")
 
 # ✅ 2. 크롤링된 텍스트 파일 불러오기
-folder_path = "Result_crawling"
+# ※ 터미널 테스트용: 여기서 만든 기본 컬렉션은 app.py가 사용하지 않음
+#    (앱은 index_refresher.py가 관리하는 campus_pages_* 컬렉션을 사용)
+folder_path = "Crawlings"
 documents = []
 for filename in os.listdir(folder_path):
     if filename.endswith(".txt"):